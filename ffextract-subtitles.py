@@ -23,73 +23,195 @@ import os
 import glob
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
 from typing import NamedTuple
+import asyncio
 import subprocess
 import json
+import functools
+import sqlite3
+import io
+import shutil
+import itertools
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+# ffmpeg programs, absolute paths resolved by main()
+FFMPEG = "ffmpeg"
+FFPROBE = "ffprobe"
+
+# constant part of the command lines
+FFPROBE_OPTIONS = (
+    "-v",
+    "quiet",
+    "-print_format",
+    "json",
+    # only the subtitle streams fields we use
+    "-select_streams",
+    "s",
+    "-show_entries",
+    "stream=index,codec_name,codec_type:stream_tags=language,title:stream_disposition=forced",
+)
+# -nostdin : concurrent ffmpeg must not switch the terminal to raw mode
+FFMPEG_OPTIONS = ("-nostdin", "-hide_banner", "-loglevel", "error", "-n")
+
+# sidecar file marking a movie whose subtitles are all extracted
+MARKER_SUFFIX = ".ffextract.done"
+
+
+def write_block(text):
+    """write a block of lines to stdout
+
+    workers all run on the event loop thread and this doesn't yield, so
+    blocks of concurrent workers never interleave
+    """
+    if not text:
+        return
+    sys.stdout.write(text)
+    sys.stdout.flush()
 
 
 class FFProbeResult(NamedTuple):
     """ffmpeg probe result"""
 
     return_code: int
-    json: str
+    json: bytes
     error: str
 
 
-def ffprobe(file_path) -> FFProbeResult:
+# on-disk cache of ffprobe results
+PROBE_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "ffextract-subtitles",
+    "probe.sqlite",
+)
+
+
+class ProbeCache:
+    """on-disk cache of successful ffprobe results
+
+    keyed by (path, mtime, size, ffprobe options) : a modified file, or a
+    change of the ffprobe command line, gets a new key, so stale entries
+    are never returned
+    """
+
+    def __init__(self, path=PROBE_CACHE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # short busy timeout : queries run on the event loop, better lose a
+        # cache entry than freeze all workers while another run writes
+        self.conn = sqlite3.connect(path, timeout=0.5)
+        # WAL : readers don't block the writer (concurrent runs)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # with WAL, no fsync on each commit
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS probe(key TEXT PRIMARY KEY, json BLOB)"
+        )
+
+    @staticmethod
+    def key(file_path):
+        """cache key of file_path (raise OSError if file is not readable)"""
+        stat = os.stat(file_path)
+        return json.dumps(
+            [
+                os.path.abspath(file_path),
+                stat.st_mtime_ns,
+                stat.st_size,
+                FFPROBE_OPTIONS,
+            ]
+        )
+
+    def get(self, key):
+        """cached ffprobe json, or None"""
+        row = self.conn.execute(
+            "SELECT json FROM probe WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, key, data):
+        """store ffprobe json
+
+        committed at once : the write lock is never held between probes
+        """
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO probe(key, json) VALUES (?, ?)", (key, data)
+            )
+
+    def close(self):
+        """close database"""
+        self.conn.close()
+
+
+async def ffprobe(file_path) -> FFProbeResult:
     """return ffprobe in json format"""
-    command_array = [
-        "ffprobe",
-        "-v",
-        "quiet",
-        "-print_format",
-        "json",
-        "-show_format",
-        "-show_streams",
-        file_path,
-    ]
+    command_array = [FFPROBE, *FFPROBE_OPTIONS, file_path]
     try:
-        result = subprocess.run(
-            command_array,
+        # "-v quiet" : stderr would always be empty, don't pipe it
+        process = await asyncio.create_subprocess_exec(
+            *command_array,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding="utf8",
-            check=True,
+            stderr=subprocess.DEVNULL,
         )
-    except (UnicodeDecodeError, subprocess.CalledProcessError) as _e:
-        return FFProbeResult(return_code=1212, json="", error=str(_e))
+        data, _ = await process.communicate()
+    except OSError as _e:
+        return FFProbeResult(return_code=1212, json=b"", error=str(_e))
     return FFProbeResult(
-        return_code=result.returncode, json=result.stdout, error=result.stderr
+        return_code=process.returncode,
+        json=data,
+        error=f"ffprobe exit code {process.returncode}",
     )
 
 
-def ffsubextract(file_path, subtitle_index, fileout_path):
-    """extract subtitle"""
-    command_array = [
-        "ffmpeg",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-n",
-        "-i",
-        file_path,
-        #  "-c",  "copy",  # <- problem
-        "-map",
-        f"0:s:{subtitle_index}",
-        fileout_path,
-    ]
+async def ffsubextract_many(file_path, mappings):
+    """extract several subtitles in a single ffmpeg pass
+
+    mappings : list of (subtitle_index, fileout_path, copy)
+        copy : True if codec matches the output format (no transcoding)
+    """
+    command_array = [FFMPEG, *FFMPEG_OPTIONS, "-i", file_path]
+    for subtitle_index, fileout_path, copy in mappings:
+        # options before an output file only apply to this output
+        command_array += ["-map", f"0:s:{subtitle_index}"]
+        if copy:
+            command_array += ["-c:s", "copy"]
+        command_array.append(fileout_path)
     try:
-        result = subprocess.run(
-            command_array,
+        process = await asyncio.create_subprocess_exec(
+            *command_array,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            universal_newlines=True,
-            encoding="utf8",
-            check=False,
         )
-    except (UnicodeDecodeError, subprocess.CalledProcessError) as _e:
+        _, error = await process.communicate()
+    except OSError as _e:
         return (-1, str(_e))
-    return (result.returncode, result.stderr)
+    return (process.returncode, error.decode("utf8", "replace"))
+
+
+# numbering of temporary outputs
+temp_counter = itertools.count()
+
+
+def temp_name(fileout_path):
+    """unique temporary name for fileout_path, same extension for ffmpeg"""
+    root, name = os.path.split(fileout_path)
+    base, ext = os.path.splitext(name)
+    return os.path.join(root, f".{base}.{os.getpid()}-{next(temp_counter)}.tmp{ext}")
+
+
+def remove_outputs(mappings):
+    """remove temporary outputs of a failed extraction (may be left empty)"""
+    for _, fileout_path, _ in mappings:
+        try:
+            os.remove(fileout_path)
+        except FileNotFoundError:
+            pass
 
 
 class ExtractSubtitles:
@@ -100,148 +222,412 @@ class ExtractSubtitles:
         args : the ArgumentParser.parse_args()
         """
         self.args = args
-        self.supported_extensions = [".mkv", ".mp4", ".mov", ".avi", ".mpg", ".mpeg"]
-        self.supported_codec = [
-            "subrip",
-            "ass",
-        ]
-        self.unsupported_codec = ["hdmv_pgs_subtitle", "dvd_subtitle"]
+        self.supported_extensions = frozenset(
+            [".mkv", ".mp4", ".mov", ".avi", ".mpg", ".mpeg"]
+        )
+        self.supported_codec = frozenset(
+            [
+                "subrip",
+                "ass",
+            ]
+        )
+        self.unsupported_codec = frozenset(["hdmv_pgs_subtitle", "dvd_subtitle"])
+        # output format for codecs that can be stream copied, others go to srt
+        self.codec_extension = {"subrip": ".srt", "ass": ".ass", "webvtt": ".vtt"}
+        # for str.endswith()
+        self.ext_tuple = tuple(self.supported_extensions)
+        self.languages = frozenset(args.language.split(","))
+        # ProbeCache, opened for the run by process_async()
+        self.probe_cache = None
+
+    async def probe(self, file_path):
+        """
+        ffprobe file_path, using the probe cache if opened
+        """
+        if self.probe_cache is None:
+            return await ffprobe(file_path)
+        try:
+            key = self.probe_cache.key(file_path)
+            data = self.probe_cache.get(key)
+        except (OSError, sqlite3.Error):
+            return await ffprobe(file_path)
+        if data is not None:
+            return FFProbeResult(return_code=0, json=data, error="")
+        result = await ffprobe(file_path)
+        if result.return_code == 0:
+            try:
+                self.probe_cache.put(key, result.json)
+            except sqlite3.Error:
+                pass
+        return result
+
+    @staticmethod
+    def stream_properties(stream):
+        """
+        Returns (codec_name, language, title, forced, is_forced, is_sdh) of a subtitle stream
+        """
+        codec_name = stream.get("codec_name", "unknown")
+        disposition = stream.get("disposition") or {}
+        forced = disposition.get("forced", "unset")
+        tags = stream.get("tags") or {}
+        language = tags.get("language", "unset")  # found for french : "fre", "fra"
+        title = tags.get("title")
+        if title is None:
+            # nothing to search in
+            title = "unset"
+            is_forced = forced == 1
+            is_sdh = False
+        else:
+            # lowercase once for both searches
+            title_lower = title.lower()
+            is_forced = (
+                forced == 1 or "forc" in title_lower
+            )  # found : 'Forced', 'forced', '... Forcé', ...
+            is_sdh = "sdh" in title_lower
+        return codec_name, language, title, forced, is_forced, is_sdh
 
-    def get_ffmpeg_track_id(self, file_path):
+    def ignore_reason(self, codec_name, language, is_forced, is_sdh):
+        """
+        Returns why a subtitle stream is not extracted, None if it is
+        """
+        # ignore unsupported codec
+        if codec_name in self.unsupported_codec:
+            return f'Ignore unsupported stream "{codec_name}"'
+        # ignore forced subtitles
+        if is_forced and not self.args.get_forced:
+            return "Ignore stream forced"
+        # ignore language
+        if language != "unset" and language not in self.languages:
+            return f'Ignore language "{language}"'
+        # ignore subtitles SDH
+        if is_sdh and not self.args.get_sdh:
+            return "Ignore stream SDH"
+        return None
+
+    def outputs(self, foutname, properties):
+        """
+        Returns (subtitle_index, fileout_path, copy) of the streams to extract
+        properties : stream_properties() of each subtitle stream
+        """
+        streams_to_extract = [
+            (index_subtitle, language, is_forced, codec_name)
+            for index_subtitle, (
+                codec_name,
+                language,
+                _,
+                _,
+                is_forced,
+                is_sdh,
+            ) in enumerate(properties)
+            if self.ignore_reason(codec_name, language, is_forced, is_sdh) is None
+        ]
+        single = len(streams_to_extract) == 1
+        outputs = []
+        for index_subtitle, language, is_forced, codec_name in streams_to_extract:
+            sext = self.codec_extension.get(codec_name, ".srt")
+            if single:
+                final_name = f"{foutname}{sext}"
+            else:
+                sforced = ".forced" if is_forced else ""
+                final_name = f"{foutname}.{language}.{index_subtitle}{sforced}{sext}"
+            # copy : codec matches the output format, no transcoding
+            outputs.append(
+                (index_subtitle, final_name, codec_name in self.codec_extension)
+            )
+        return outputs
+
+    async def get_ffmpeg_track_id(self, file_path, out=None):
         """
         Returns the track ID of the SRT subtitles track
+        out : text stream for messages (default: stdout)
         """
+        log = functools.partial(print, file=out or sys.stdout)
+        # diagnostics modes always examine the file
+        quiet = not (self.args.scan_only or self.args.show_probe or self.args.verbose)
+        if quiet and self.already_extracted(file_path):
+            return
         # ffmpeg probe
-        ffprobe_result = ffprobe(file_path=file_path)
+        ffprobe_result = await self.probe(file_path)
         if ffprobe_result.return_code != 0:
-            print(f'Error probe file "{file_path}"')
-            print("  ", ffprobe_result.error, file=sys.stderr)
+            log(f'Error probe file "{file_path}"')
+            log("  ", ffprobe_result.error)
             return
-        ffprobe_json = json.loads(ffprobe_result.json)
-        fname_printed = False
-        index_subtitle = -1
-        streams_to_extract = []
+        ffprobe_json = json_loads(ffprobe_result.json)
         # keep only subtitle streams
         streams = [
             stream
             for stream in ffprobe_json.get("streams", [])
             if stream.get("codec_type", "unknown") == "subtitle"
         ]
-        if not streams and self.args.verbose > 1:
-            print(f'No subtitles for "{file_path}"')
+        if not streams:
+            if self.args.verbose > 1:
+                log(f'No subtitles for "{file_path}"')
             return
+        # stream fields are read once, for both the outputs and the messages
+        properties = [self.stream_properties(stream) for stream in streams]
+        foutname, _ = os.path.splitext(file_path)
+        outputs = self.outputs(foutname, properties)
+        if not self.args.scan_only and not self.args.show_probe:
+            # every output exists : nothing to examine
+            if outputs and all(
+                os.path.exists(final_name) for _, final_name, _ in outputs
+            ):
+                if self.args.verbose:
+                    log(f'Subtitles already extracted for "{file_path}"')
+                self.mark_extracted(file_path, outputs)
+                return
+        action = "Scan" if self.args.scan_only else "Process"
+        log(f'{action} "{file_path}" for {len(streams)} subtitle(s)')
         # examine streams
-        for stream in streams:
-            index_subtitle += 1
-            index = stream.get("index", "unknown")
-            codec_name = stream.get("codec_name", "unknown")
-            if not fname_printed:
-                action = "Scan" if self.args.scan_only else "Process"
-                print(f'{action} "{file_path}" for {len(streams)} subtitle(s)')
-                fname_printed = True
+        for index_subtitle, (
+            stream,
+            (codec_name, language, title, forced, is_forced, is_sdh),
+        ) in enumerate(zip(streams, properties)):
             if self.args.show_probe:
-                print(f"  ---> json subtitle {index_subtitle + 1} :")
+                log(f"  ---> json subtitle {index_subtitle + 1} :")
                 lines = json.dumps(stream, indent=4).splitlines()
                 for line in lines:
-                    print("  ", line)
-            disposition = stream.get("disposition", {})
-            forced = disposition.get("forced", "unset")
-            tags = stream.get("tags", {})
-            language = tags.get("language", "unset")  # found for french : "fre", "fra"
-            title = tags.get("title", "unset")
-            is_forced = (
-                forced == 1 or "forc" in title.lower()
-            )  # found : 'Forced', 'forced', '... Forcé', ...
+                    log("  ", line)
             if self.args.verbose > 1:
-                print(
+                index = stream.get("index", "unknown")
+                log(
                     f"  ---> subtitle {index_subtitle + 1} : stream_id:{index}  -  subtitle_id:{index_subtitle}  -  codec:{codec_name}  -  language:{language}  -   forced:{forced} ({is_forced})  -  title:{title}  "
                 )
 
             if self.args.scan_only:
                 continue
 
-            # ignore unsupported codec
-            if codec_name in self.unsupported_codec:
-                if self.args.verbose:
-                    print(f'  ! Ignore unsupported stream "{codec_name}"')
-                continue
-
-            # ignore forced subtitles
-            if is_forced:
-                if not self.args.get_forced:
-                    if self.args.verbose:
-                        print("  ! Ignore stream forced")
-                    continue
+            if self.args.verbose:
+                reason = self.ignore_reason(codec_name, language, is_forced, is_sdh)
+                if reason:
+                    log(f"  ! {reason}")
 
-            # ignore language
-            if language != "unset":
-                if language not in self.args.language.split(","):
-                    if self.args.verbose:
-                        print(f'  ! Ignore language "{language}"')
-                    continue
-
-            # ignore subtitles SDH
-            if "sdh" in title.lower() and not self.args.get_sdh:
-                if self.args.verbose:
-                    print("  ! Ignore stream SDH")
-                continue
-
-            # OK, this stream will be extracted
-            streams_to_extract.append((index_subtitle, language, is_forced))
+        if self.args.scan_only:
+            return
 
         # extract subtitles
-        for index_subtitle, language, is_forced in streams_to_extract:
-            foutname, _ = os.path.splitext(file_path)
-            if len(streams_to_extract) == 1:
-                final_name = f"{foutname}.srt"
-            else:
-                sforced = ".forced" if is_forced else ""
-                final_name = f"{foutname}.{language}.{index_subtitle}{sforced}.srt"
+        mappings = []
+        for index_subtitle, final_name, copy in outputs:
             if self.args.verbose > 1:
-                print("  Subtitle filename : ", final_name)
+                log("  Subtitle filename : ", final_name)
             # never rewrite subtitles
             if os.path.exists(final_name):
                 if self.args.verbose:
-                    print(f"  ! Subtitles already exists ({final_name})")
+                    log(f"  ! Subtitles already exists ({final_name})")
                 continue
-            code, result = ffsubextract(file_path, index_subtitle, final_name)
+            mappings.append((index_subtitle, final_name, copy))
+        if not mappings or await self.extract(file_path, mappings, log):
+            if outputs:
+                self.mark_extracted(file_path, outputs)
+
+    async def extract(self, file_path, mappings, log):
+        """
+        extract subtitles, returns True if all outputs are done
+        mappings : see ffsubextract_many()
+        """
+        # ffmpeg writes to temporary names of ours, moved in place when done :
+        # a failed pass never removes a file it did not create (same output
+        # of "x.mkv" and "x.mp4" from another worker, ...)
+        temp_mappings = [
+            (subtitle_index, temp_name(fileout_path), copy)
+            for subtitle_index, fileout_path, copy in mappings
+        ]
+        # all streams extracted in one pass : container is read only once
+        code, result = await ffsubextract_many(file_path, temp_mappings)
+        if code == 0:
+            for (_, final_name, _), (_, temp_path, _) in zip(mappings, temp_mappings):
+                self.place_output(temp_path, final_name, log)
+            return True
+        remove_outputs(temp_mappings)
+        if len(mappings) == 1:
+            log(f'  !!! ERROR code {code} : "{result}"')
+            return False
+        # one bad stream fails the whole pass : retry streams one by one
+        if self.args.verbose:
+            log(f"  ! Extraction failed (code {code}), retry each subtitle alone")
+        done = True
+        for (_, final_name, _), temp_mapping in zip(mappings, temp_mappings):
+            code, result = await ffsubextract_many(file_path, [temp_mapping])
             if code != 0:
-                print(f'  !!! ERROR code {code} : "{result}"')
+                remove_outputs([temp_mapping])
+                log(f'  !!! ERROR code {code} for {final_name} : "{result}"')
+                done = False
             else:
-                print("  extract done : ", final_name)
-
-    def process_movie(self, root, name):
-        """process movie"""
-        if not root:
-            root, name = os.path.split(name)
-        (basename, ext) = os.path.splitext(name)
-        if not ext in self.supported_extensions:
-            return
-        self.get_ffmpeg_track_id(os.path.join(root, name))
+                self.place_output(temp_mapping[1], final_name, log)
+        return done
 
-    def process(self):
+    def place_output(self, temp_path, fileout_path, log):
         """
-        main entry
+        move an extracted subtitle to its final name, never replacing a file
+        """
+        try:
+            try:
+                # atomic, fails if fileout_path exists
+                os.link(temp_path, fileout_path)
+            except FileExistsError:
+                if self.args.verbose:
+                    log(f"  ! Subtitles already exists ({fileout_path})")
+                return
+            except OSError:
+                # no hard links on this filesystem
+                if os.path.exists(fileout_path):
+                    if self.args.verbose:
+                        log(f"  ! Subtitles already exists ({fileout_path})")
+                    return
+                os.replace(temp_path, fileout_path)
+        finally:
+            remove_outputs([(None, temp_path, None)])
+        log("  extract done : ", fileout_path)
+
+    def marker_state(self, file_path):
+        """
+        Returns movie state and extraction options, as stored in the marker
+        """
+        stat = os.stat(file_path)
+        return {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "language": sorted(self.languages),
+            "get_forced": bool(self.args.get_forced),
+            "get_sdh": bool(self.args.get_sdh),
+        }
+
+    def already_extracted(self, file_path):
         """
+        True if a previous run extracted all subtitles of file_path with the
+        same options (its marker is written by mark_extracted()), and these
+        subtitles still exist
+        """
+        root = os.path.dirname(file_path)
+        marker = os.path.splitext(file_path)[0] + MARKER_SUFFIX
+        try:
+            with open(marker, "rb") as fd:
+                content = json_loads(fd.read())
+            if content["state"] != self.marker_state(file_path):
+                return False
+            return all(
+                os.path.exists(os.path.join(root, name)) for name in content["outputs"]
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            # no marker, or not one of ours
+            return False
+
+    def mark_extracted(self, file_path, outputs):
+        """
+        write the marker of a complete extraction : next runs skip ffprobe
+        outputs : see outputs()
+        """
+        marker = os.path.splitext(file_path)[0] + MARKER_SUFFIX
+        try:
+            content = json.dumps(
+                {
+                    "state": self.marker_state(file_path),
+                    "outputs": [
+                        os.path.basename(final_name) for _, final_name, _ in outputs
+                    ],
+                },
+                sort_keys=True,
+            )
+            with open(marker, "w", encoding="utf8") as fd:
+                fd.write(content)
+        except OSError:
+            # read only directory... : file will be probed again next time
+            pass
+
+    def iter_files(self):
+        """
+        yield path of supported files, each file only once
+        """
+        # real paths already yielded (overlapping patterns, symlinks)
+        seen = set()
         for glob_name in self.args.filelist:
             glob_name = glob_name.rstrip("\r\n")
             if os.path.isdir(glob_name):
                 glob_name = os.path.join(glob_name, "*")
             for fname in glob.glob(glob_name):
                 if os.path.isfile(fname):
-                    self.process_movie(None, fname)
+                    if not fname.lower().endswith(self.ext_tuple):
+                        continue
+                    files = [fname]
                 elif os.path.isdir(fname):
                     if not self.args.recursive:
                         continue
-                    for root, _, files in os.walk(fname):
-                        for fname in files:
-                            self.process_movie(root, fname)
+                    files = self.iter_media(fname)
+                else:
+                    continue
+                for file_path in files:
+                    real_path = os.path.realpath(file_path)
+                    if real_path in seen:
+                        continue
+                    seen.add(real_path)
+                    yield file_path
+
+    def iter_media(self, root):
+        """
+        recursively yield path of supported files under root
+        """
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self.iter_media(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(
+                        self.ext_tuple
+                    ):
+                        yield entry.path
+        except OSError:
+            # unreadable directory, ignored as os.walk() did
+            return
+
+    async def process_file(self, file_path):
+        """
+        process a file, its messages are printed as one block
+        """
+        out = io.StringIO()
+        try:
+            await self.get_ffmpeg_track_id(file_path, out)
+        finally:
+            write_block(out.getvalue())
+
+    async def process_async(self):
+        """
+        process files, with up to args.jobs ffprobe/ffmpeg running at once
+        """
+        files = self.iter_files()
+
+        async def worker():
+            # workers share the files generator : each file is processed once
+            for file_path in files:
+                await self.process_file(file_path)
+
+        # one cache connection for the whole run, used from the event loop only
+        if not self.args.no_cache:
+            try:
+                self.probe_cache = ProbeCache()
+            except (OSError, sqlite3.Error) as _e:
+                print(f"Warning, ffprobe cache disabled ({_e})", file=sys.stderr)
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.args.jobs)))
+        finally:
+            if self.probe_cache is not None:
+                try:
+                    self.probe_cache.close()
+                except sqlite3.Error:
+                    pass
+                self.probe_cache = None
+
+    def process(self):
+        """
+        main entry
+        """
+        asyncio.run(self.process_async())
 
 
 def main():
     """
     Main entry
     """
+    global FFMPEG, FFPROBE  # pylint: disable=global-statement
 
     parser = ArgumentParser(
         description="Extract subtitles from video files",
@@ -272,6 +658,18 @@ def main():
         "-r", "--recursive", action="store_true", help="process subdirectories"
     )
     parser.add_argument("--scan-only", action="store_true", help="scan files and exit")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"don't read or write the ffprobe cache ({PROBE_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of files processed in parallel (default: number of CPUs)",
+    )
 
     args = parser.parse_args()
 
@@ -279,6 +677,16 @@ def main():
         print("Error, need to specify directory or file  to parse")
         sys.exit(1)
 
+    # search PATH once, and fail now if ffmpeg is not installed
+    FFMPEG = shutil.which("ffmpeg")
+    FFPROBE = shutil.which("ffprobe")
+    if not FFMPEG or not FFPROBE:
+        print("Error, ffmpeg and ffprobe must be installed", file=sys.stderr)
+        sys.exit(1)
+
+    if args.jobs is None or args.jobs < 1:
+        args.jobs = 1
+
     if args.scan_only:
         # force verbosity
         args.verbose = max(args.verbose, 2)